@@ -15,18 +15,61 @@ Output format:
 Usage examples:
   python3 extract_snapshots.py --profile my-sso --all-regions --service ebs --days 30 --output snapshots.txt
   python3 extract_snapshots.py --profile my-sso --region us-east-1 --service both --days 45 --output out.txt
+  python3 extract_snapshots.py --profile my-sso --all-regions --service both --async --output snapshots.txt  # needs aioboto3
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import hashlib
+import heapq
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Iterable, List, Optional
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import boto3
-from botocore.config import Config
+from botocore.client import BaseClient
 from botocore.exceptions import BotoCoreError, ClientError
 
+from snapshots_common import (
+    EBS_PAGE_SIZE,
+    OUTPUT_BUFFER_SIZE,
+    RDS_PAGE_SIZE,
+    build_session,
+    ebs_rows,
+    ebs_snapshot_filters,
+    get_cfg,
+    get_client,
+    iter_ebs,
+    iter_rds_clusters,
+    iter_rds_instances,
+    rds_rows,
+    set_session,
+)
+
+try:
+    import aioboto3
+except ImportError:  # optional, only needed for --async
+    aioboto3 = None
+
+# Upper bound on concurrent (region, service) listings.
+MAX_WORKERS = 32
+
+# Opted-in regions rarely change, so the list is cached per profile (or env credentials) for a day.
+REGION_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "snapshots-extract")
+REGION_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# botocore credential methods that resolve from a named profile in the config/credentials files.
+PROFILE_CREDENTIAL_METHODS = frozenset(
+    {"shared-credentials-file", "config-file", "sso", "assume-role", "custom-process"}
+)
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Extract snapshot names and creation times older than N days.")
@@ -43,18 +86,43 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Query all opted-in regions (for both EC2 and RDS).",
     )
+    parser.add_argument(
+        "--refresh-regions",
+        action="store_true",
+        help=(
+            "With --all-regions, ignore the cached region list (kept per profile or env credentials for 24h under "
+            "~/.cache/snapshots-extract) and fetch it again."
+        ),
+    )
     parser.add_argument(
         "--service",
         choices=["ebs", "rds", "both"],
         default="ebs",
         help="Which service snapshots to include.",
     )
+    parser.add_argument(
+        "--only-named",
+        action="store_true",
+        help=(
+            "Only include EBS snapshots that carry a Name tag, filtered server-side (much less data on large "
+            "accounts). Untagged snapshots, which would otherwise be reported by description or id, are skipped."
+        ),
+    )
     parser.add_argument(
         "--days",
         type=int,
         default=30,
         help="Age threshold in days. Snapshots created at or before now - days are included.",
     )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help=(
+            "Fetch with aioboto3 on a single asyncio event loop instead of a thread pool. Scales better to many "
+            "regions; requires the optional aioboto3 package and falls back to threads without it."
+        ),
+    )
     parser.add_argument(
         "--output",
         default="snapshots.txt",
@@ -63,14 +131,8 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def build_session(profile_name: Optional[str]) -> boto3.session.Session:
-    if profile_name:
-        return boto3.session.Session(profile_name=profile_name)
-    return boto3.session.Session()
-
-
 def list_opted_in_regions(session: boto3.session.Session) -> List[str]:
-    client = session.client("ec2", config=Config(retries={"max_attempts": 10, "mode": "standard"}))
+    client = session.client("ec2", config=get_cfg())
     regions = []
     try:
         resp = client.describe_regions(AllRegions=False)
@@ -84,78 +146,162 @@ def list_opted_in_regions(session: boto3.session.Session) -> List[str]:
     return sorted(set(regions))
 
 
-def get_ebs_snapshots(
-    session: boto3.session.Session,
+def cached_opted_in_regions(session: boto3.session.Session, refresh: bool = False) -> List[str]:
+    """
+    Return list_opted_in_regions(session), served from a per-identity cache file while it is younger than a day.
+
+    Profile-sourced credentials are keyed on the profile name plus the config/credentials files it was read from,
+    and environment-variable credentials on a hash of the access key id; neither needs an STS round trip. Other
+    sources (web identity, container or instance roles) carry no stable account identity, so they bypass the
+    cache. Cache read/write failures fall back to the API silently.
+    """
+    credentials = session.get_credentials()
+    method = credentials.method if credentials is not None else None
+    if method == "env":
+        cache_key = "env-" + hashlib.sha256(credentials.access_key.encode("utf-8")).hexdigest()[:16]
+    elif method in PROFILE_CREDENTIAL_METHODS:
+        config_files = "\0".join(
+            os.path.abspath(os.path.expanduser(os.environ.get(var, default)))
+            for var, default in (
+                ("AWS_CONFIG_FILE", "~/.aws/config"),
+                ("AWS_SHARED_CREDENTIALS_FILE", "~/.aws/credentials"),
+            )
+        )
+        profile = re.sub(r"[^A-Za-z0-9._-]", "_", session.profile_name or "default")
+        cache_key = f"{profile}-{hashlib.sha256(config_files.encode('utf-8')).hexdigest()[:16]}"
+    else:
+        return list_opted_in_regions(session)
+    cache_path = os.path.join(REGION_CACHE_DIR, f"regions-{cache_key}.json")
+
+    if not refresh:
+        try:
+            if time.time() - os.path.getmtime(cache_path) < REGION_CACHE_TTL_SECONDS:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+                if isinstance(cached, list) and cached and all(isinstance(r, str) for r in cached):
+                    return cached
+        except (OSError, ValueError):
+            pass
+
+    regions = list_opted_in_regions(session)
+    try:
+        os.makedirs(REGION_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(regions, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return regions
+
+
+def fetch_snapshots(
+    fetch: Callable[..., Iterable[Dict[str, str]]],
+    client: BaseClient,
     region: str,
+    label: str,
     cutoff_dt: datetime,
-) -> Iterable[Dict[str, str]]:
-    client = session.client("ec2", region_name=region, config=Config(retries={"max_attempts": 10, "mode": "standard"}))
-
-    paginator = client.get_paginator("describe_snapshots")
-    # Limit to snapshots owned by the caller.
-    page_iterator = paginator.paginate(OwnerIds=["self"])  # type: ignore[call-arg]
-
-    for page in page_iterator:
-        for snap in page.get("Snapshots", []):
-            start_time: datetime = snap.get("StartTime")
-            if not isinstance(start_time, datetime):
-                continue
-            # Include snapshots created at or before the cutoff
-            if start_time <= cutoff_dt:
-                tags = snap.get("Tags", []) or []
-                name_tag = next((t.get("Value") for t in tags if t.get("Key") == "Name"), None)
-                description = snap.get("Description")
-                snapshot_id = snap.get("SnapshotId")
-                # Determine a human-friendly name
-                display_name = name_tag or description or snapshot_id or "<unnamed>"
-                yield {
-                    "name": str(display_name),
-                    "created": start_time.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-                }
-
-
-def get_rds_instance_snapshots(
-    session: boto3.session.Session,
+) -> List[Tuple[str, str]]:
+    """
+    Run one listing in a worker thread and return its rows as (created, name) pairs, sorted.
+
+    Plain tuple ordering sorts by created time, then name, so the per-listing runs can be k-way merged with
+    heapq.merge. API errors produce a warning and keep whatever was listed before the failure.
+    """
+    pairs: List[Tuple[str, str]] = []
+    try:
+        for row in fetch(client, cutoff_dt):
+            pairs.append((row["created"], row["name"]))
+    except (BotoCoreError, ClientError) as exc:
+        print(f"Warning: Failed to list {label} in {region}: {exc}")
+    pairs.sort()
+    return pairs
+
+
+async def _list_async(
+    client: object,
     region: str,
+    label: str,
+    operation: str,
+    params: Dict[str, object],
+    result_key: str,
+    to_rows: Callable[..., Iterable[Dict[str, str]]],
     cutoff_dt: datetime,
-) -> Iterable[Dict[str, str]]:
-    client = session.client("rds", region_name=region, config=Config(retries={"max_attempts": 10, "mode": "standard"}))
-    paginator = client.get_paginator("describe_db_snapshots")
-    page_iterator = paginator.paginate()
-
-    for page in page_iterator:
-        for snap in page.get("DBSnapshots", []):
-            created: datetime = snap.get("SnapshotCreateTime")
-            if not isinstance(created, datetime):
-                continue
-            if created <= cutoff_dt:
-                name = snap.get("DBSnapshotIdentifier") or "<unnamed>"
-                yield {
-                    "name": str(name),
-                    "created": created.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-                }
-
-
-def get_rds_cluster_snapshots(
-    session: boto3.session.Session,
+) -> List[Tuple[str, str]]:
+    # Same contract as fetch_snapshots: warn on API errors and keep the pages listed before the failure.
+    pairs: List[Tuple[str, str]] = []
+    try:
+        async for page in client.get_paginator(operation).paginate(**params):  # type: ignore[attr-defined]
+            rows = to_rows(page.get(result_key, []), cutoff_dt=cutoff_dt)
+            pairs.extend((r["created"], r["name"]) for r in rows)
+    except (BotoCoreError, ClientError) as exc:
+        print(f"Warning: Failed to list {label} in {region}: {exc}")
+    pairs.sort()
+    return pairs
+
+
+async def _fetch_service_async(
+    aio_session: object,
+    service: str,
     region: str,
+    listings: List[Tuple[str, str, Dict[str, object], str, Callable[..., Iterable[Dict[str, str]]]]],
+    cutoff_dt: datetime,
+) -> List[List[Tuple[str, str]]]:
+    """Run the listings of one service in one region concurrently on a shared aioboto3 client; see fetch_snapshots."""
+    try:
+        async with aio_session.client(service, region_name=region, config=get_cfg()) as client:  # type: ignore[attr-defined]
+            return await asyncio.gather(
+                *(
+                    _list_async(client, region, label, operation, params, result_key, to_rows, cutoff_dt)
+                    for label, operation, params, result_key, to_rows in listings
+                )
+            )
+    except (BotoCoreError, ClientError) as exc:
+        print(f"Warning: Failed to create {service} client in {region}: {exc}")
+        return []
+
+
+async def fetch_all_async(
+    profile_name: Optional[str],
+    regions: List[str],
+    include_ebs: bool,
+    include_rds: bool,
     cutoff_dt: datetime,
-) -> Iterable[Dict[str, str]]:
-    client = session.client("rds", region_name=region, config=Config(retries={"max_attempts": 10, "mode": "standard"}))
-    paginator = client.get_paginator("describe_db_cluster_snapshots")
-    page_iterator = paginator.paginate()
-
-    for page in page_iterator:
-        for snap in page.get("DBClusterSnapshots", []):
-            created: datetime = snap.get("SnapshotCreateTime")
-            if not isinstance(created, datetime):
-                continue
-            if created <= cutoff_dt:
-                name = snap.get("DBClusterSnapshotIdentifier") or "<unnamed>"
-                yield {
-                    "name": str(name),
-                    "created": created.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-                }
+    only_named: bool,
+) -> List[List[Tuple[str, str]]]:
+    """
+    aioboto3 counterpart of the thread pool in main(): every (region, service) listing runs on one event loop.
+
+    Returns one sorted run of (created, name) pairs per listing, as fetch_snapshots does.
+    """
+    aio_session = aioboto3.Session(profile_name=profile_name) if profile_name else aioboto3.Session()
+    ebs_params: Dict[str, object] = {
+        "OwnerIds": ["self"],
+        "Filters": ebs_snapshot_filters(cutoff_dt, only_named),
+        "PaginationConfig": {"PageSize": EBS_PAGE_SIZE},
+    }
+    rds_params: Dict[str, object] = {"PaginationConfig": {"PageSize": RDS_PAGE_SIZE}}
+    rds_instance_rows = partial(rds_rows, id_key="DBSnapshotIdentifier")
+    rds_cluster_rows = partial(rds_rows, id_key="DBClusterSnapshotIdentifier")
+
+    jobs = []
+    for region in regions:
+        if include_ebs:
+            ebs = [("EBS snapshots", "describe_snapshots", ebs_params, "Snapshots", ebs_rows)]
+            jobs.append(_fetch_service_async(aio_session, "ec2", region, ebs, cutoff_dt))
+        if include_rds:
+            rds = [
+                ("RDS DB snapshots", "describe_db_snapshots", rds_params, "DBSnapshots", rds_instance_rows),
+                (
+                    "RDS cluster snapshots",
+                    "describe_db_cluster_snapshots",
+                    rds_params,
+                    "DBClusterSnapshots",
+                    rds_cluster_rows,
+                ),
+            ]
+            jobs.append(_fetch_service_async(aio_session, "rds", region, rds, cutoff_dt))
+    return [run for runs in await asyncio.gather(*jobs) for run in runs]
 
 
 def main() -> None:
@@ -165,13 +311,14 @@ def main() -> None:
         session = build_session(args.profile)
     except Exception as exc:  # noqa: BLE001
         raise SystemExit(f"Failed to create AWS session: {exc}")
+    set_session(session)
 
     now_utc = datetime.now(timezone.utc)
     cutoff_dt = now_utc - timedelta(days=int(args.days))
 
     if args.all_regions:
         try:
-            regions = list_opted_in_regions(session)
+            regions = cached_opted_in_regions(session, refresh=args.refresh_regions)
         except Exception as exc:  # noqa: BLE001
             raise SystemExit(str(exc))
     else:
@@ -181,39 +328,55 @@ def main() -> None:
             raise SystemExit("No region specified and no default region configured in the profile. Use --region or --all-regions.")
         regions = [region]
 
-    rows: List[Dict[str, str]] = []
-
     include_ebs = args.service in ("ebs", "both")
     include_rds = args.service in ("rds", "both")
 
-    for region in regions:
-        if include_ebs:
-            try:
-                rows.extend(get_ebs_snapshots(session, region, cutoff_dt))
-            except (BotoCoreError, ClientError) as exc:
-                print(f"Warning: Failed to list EBS snapshots in {region}: {exc}")
+    use_async = args.use_async
+    if use_async and aioboto3 is None:
+        print("Warning: --async requires the aioboto3 package; falling back to the thread pool.")
+        use_async = False
 
-        if include_rds:
+    # Each (region, service) listing is independent and latency bound, so fan them all out at once.
+    # Clients are built here, once per (service, region), and shared by the listings that need them.
+    tasks: List[Tuple[BaseClient, str, str, Callable[..., Iterable[Dict[str, str]]]]] = []
+    if not use_async:
+        for region in regions:
             try:
-                rows.extend(get_rds_instance_snapshots(session, region, cutoff_dt))
+                if include_ebs:
+                    ebs_client = get_client("ec2", region)
+                    list_ebs = partial(iter_ebs, only_named=args.only_named)
+                    tasks.append((ebs_client, region, "EBS snapshots", list_ebs))
+                if include_rds:
+                    rds_client = get_client("rds", region)
+                    tasks.append((rds_client, region, "RDS DB snapshots", iter_rds_instances))
+                    tasks.append((rds_client, region, "RDS cluster snapshots", iter_rds_clusters))
             except (BotoCoreError, ClientError) as exc:
-                print(f"Warning: Failed to list RDS DB snapshots in {region}: {exc}")
-            try:
-                rows.extend(get_rds_cluster_snapshots(session, region, cutoff_dt))
-            except (BotoCoreError, ClientError) as exc:
-                print(f"Warning: Failed to list RDS cluster snapshots in {region}: {exc}")
-
-    # Sort by created time ascending then name
-    rows.sort(key=lambda r: (r["created"], r["name"]))
+                print(f"Warning: Failed to create clients for {region}: {exc}")
+
+    per_region_sorted: List[List[Tuple[str, str]]] = []
+    if use_async:
+        per_region_sorted = asyncio.run(
+            fetch_all_async(args.profile, regions, include_ebs, include_rds, cutoff_dt, args.only_named)
+        )
+    elif tasks:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(tasks))) as executor:
+            futures = [
+                executor.submit(fetch_snapshots, fetch, client, region, label, cutoff_dt)
+                for client, region, label, fetch in tasks
+            ]
+            for future in as_completed(futures):
+                per_region_sorted.append(future.result())
+
+    total = sum(len(run) for run in per_region_sorted)
 
     try:
-        with open(args.output, "w", encoding="utf-8") as f:
-            for r in rows:
-                f.write(f"{r['name']}\t{r['created']}\n")
+        with open(args.output, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE) as f:
+            # Every run is sorted by (created, name), so a k-way merge yields created time ascending then name.
+            f.writelines(f"{name}\t{created}\n" for created, name in heapq.merge(*per_region_sorted))
     except OSError as exc:
         raise SystemExit(f"Failed to write output file {args.output}: {exc}")
 
-    print(f"Wrote {len(rows)} records to {args.output}")
+    print(f"Wrote {total} records to {args.output}")
 
 
 if __name__ == "__main__":
@@ -15,13 +15,13 @@ Examples:
 from __future__ import annotations
 
 import argparse
-from datetime import datetime, timezone
+import sys
 from typing import List
 
-import boto3
-from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError
 
+from snapshots_common import OUTPUT_BUFFER_SIZE, build_session, get_client, iter_ebs, set_session
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="List EBS snapshots and their creation time.")
@@ -31,6 +31,14 @@ def parse_args() -> argparse.Namespace:
         default="sa-east-1",
         help="AWS region to query (default: sa-east-1).",
     )
+    parser.add_argument(
+        "--only-named",
+        action="store_true",
+        help=(
+            "Only list snapshots that carry a Name tag, filtered server-side (much less data on large accounts). "
+            "Untagged snapshots, which would otherwise be listed by description or id, are skipped."
+        ),
+    )
     parser.add_argument(
         "--output",
         help="Optional path to write results. If omitted, only prints to stdout.",
@@ -38,12 +46,6 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def build_session(profile_name: str | None) -> boto3.session.Session:
-    if profile_name:
-        return boto3.session.Session(profile_name=profile_name)
-    return boto3.session.Session()
-
-
 def main() -> None:
     args = parse_args()
 
@@ -52,41 +54,27 @@ def main() -> None:
     except Exception as exc:  # noqa: BLE001
         raise SystemExit(f"Failed to create AWS session: {exc}")
 
-    client = session.client(
-        "ec2",
-        region_name=args.region,
-        config=Config(retries={"max_attempts": 10, "mode": "standard"}),
-    )
+    set_session(session)
 
+    # (created, name) so the natural tuple ordering sorts oldest first without a key function
     rows: List[tuple[str, str]] = []
     try:
-        paginator = client.get_paginator("describe_snapshots")
-        for page in paginator.paginate(OwnerIds=["self"]):  # type: ignore[call-arg]
-            for snap in page.get("Snapshots", []):
-                start_time: datetime | None = snap.get("StartTime")
-                if not isinstance(start_time, datetime):
-                    continue
-                tags = snap.get("Tags", []) or []
-                name_tag = next((t.get("Value") for t in tags if t.get("Key") == "Name"), None)
-                description = snap.get("Description")
-                snapshot_id = snap.get("SnapshotId")
-                display_name = name_tag or description or snapshot_id or "<unnamed>"
-                created_utc = start_time.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-                rows.append((str(display_name), created_utc))
+        client = get_client("ec2", args.region)
+        for row in iter_ebs(client, only_named=args.only_named):
+            rows.append((row["created"], row["name"]))
     except (BotoCoreError, ClientError) as exc:
         raise SystemExit(f"Failed to list EBS snapshots in {args.region}: {exc}")
 
     # Sort oldest first
-    rows.sort(key=lambda r: (r[1], r[0]))
+    rows.sort()
 
-    for name, created in rows:
-        print(f"{name}\t{created}")
+    lines = [f"{name}\t{created}\n" for created, name in rows]
+    sys.stdout.writelines(lines)
 
     if args.output:
         try:
-            with open(args.output, "w", encoding="utf-8") as f:
-                for name, created in rows:
-                    f.write(f"{name}\t{created}\n")
+            with open(args.output, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE) as f:
+                f.writelines(lines)
             print(f"Wrote {len(rows)} records to {args.output}")
         except OSError as exc:
             raise SystemExit(f"Failed to write output file {args.output}: {exc}")
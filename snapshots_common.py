@@ -0,0 +1,188 @@
+"""
+Shared AWS plumbing for extract_snapshots.py and list_ebs_snapshots.py.
+
+Holds the client configuration, the per-(service, region) client cache and the snapshot listing code paths,
+so every optimization to them applies to both scripts.
+
+Each iter_* function yields rows of the form {"name": ..., "created": "<UTC ISO-8601>"}. A cutoff datetime
+restricts them to snapshots created at or before it; without one, every snapshot owned by the caller is listed.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+import boto3
+from botocore.client import BaseClient
+from botocore.config import Config
+
+# Largest page sizes the APIs accept (EC2 MaxResults <= 1000, RDS MaxRecords <= 100); fewer round trips.
+EBS_PAGE_SIZE = 1000
+RDS_PAGE_SIZE = 100
+
+# Buffer size for the output files both scripts write.
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# No EBS snapshot predates this year; lower bound for the server-side start-time filter.
+EBS_FIRST_YEAR = 2008
+
+# Session that get_client() builds from; set once by set_session() before any client is requested.
+_SESSION: Optional[boto3.session.Session] = None
+
+
+def get_cfg() -> Config:
+    # Keep connections alive between pages, and size the pool for concurrent callers sharing a client.
+    return Config(
+        retries={"max_attempts": 10, "mode": "adaptive"},
+        tcp_keepalive=True,
+        max_pool_connections=64,
+        connect_timeout=5,
+        read_timeout=30,
+    )
+
+
+def format_iso(dt: datetime) -> str:
+    # boto3 already returns UTC datetimes, so isoformat only needs its "+00:00" suffix swapped for "Z".
+    return dt.isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+def build_session(profile_name: Optional[str]) -> boto3.session.Session:
+    if profile_name:
+        return boto3.session.Session(profile_name=profile_name)
+    return boto3.session.Session()
+
+
+def set_session(session: boto3.session.Session) -> None:
+    global _SESSION
+    _SESSION = session
+    get_client.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_client(service: str, region: str) -> BaseClient:
+    """
+    Return the client for (service, region) built from the current session, constructing it only once.
+
+    Client construction loads the service model and resolves endpoints, so it is worth sharing. boto3 sessions
+    are not thread-safe: call this from the main thread; the returned clients are safe to use from workers.
+    """
+    if _SESSION is None:
+        raise RuntimeError("set_session() must be called before get_client()")
+    return _SESSION.client(service, region_name=region, config=get_cfg())
+
+
+def ebs_start_time_filter_values(cutoff_dt: datetime) -> List[str]:
+    """
+    Build EC2 `start-time` filter values (wildcard patterns, OR-ed together) matching every day up to cutoff_dt.
+
+    Whole years and months before the cutoff collapse into a single pattern each, so the list stays well under
+    the API's limit on filter values. The cutoff day itself is matched in full; callers still compare times.
+    """
+    cutoff = cutoff_dt.astimezone(timezone.utc)
+    values = [f"{year:04d}-*" for year in range(EBS_FIRST_YEAR, cutoff.year)]
+    values.extend(f"{cutoff.year:04d}-{month:02d}-*" for month in range(1, cutoff.month))
+    values.extend(f"{cutoff.year:04d}-{cutoff.month:02d}-{day:02d}T*" for day in range(1, cutoff.day + 1))
+    return values
+
+
+def ebs_snapshot_filters(cutoff_dt: Optional[datetime] = None, only_named: bool = False) -> List[Dict[str, object]]:
+    # Let EC2 drop anything newer than the cutoff day and, if asked, anything without a Name tag.
+    filters: List[Dict[str, object]] = []
+    if cutoff_dt is not None:
+        filters.append({"Name": "start-time", "Values": ebs_start_time_filter_values(cutoff_dt)})
+    if only_named:
+        filters.append({"Name": "tag-key", "Values": ["Name"]})
+    return filters
+
+
+def ebs_rows(snaps: Iterable[Dict[str, Any]], cutoff_dt: Optional[datetime] = None) -> Iterable[Dict[str, str]]:
+    """Turn describe_snapshots records into output rows, keeping those created at or before the cutoff."""
+    for snap in snaps:
+        start_time = snap.get("StartTime")
+        if not isinstance(start_time, datetime):
+            continue
+        # Include snapshots created at or before the cutoff (the filter only narrows to the day)
+        if cutoff_dt is None or start_time <= cutoff_dt:
+            tags = snap.get("Tags", []) or []
+            name_tag = next((t.get("Value") for t in tags if t.get("Key") == "Name"), None)
+            # Determine a human-friendly name
+            display_name = name_tag or snap.get("Description") or snap.get("SnapshotId") or "<unnamed>"
+            yield {
+                "name": str(display_name),
+                "created": format_iso(start_time),
+            }
+
+
+def rds_rows(
+    snaps: Iterable[Dict[str, Any]],
+    id_key: str,
+    cutoff_dt: Optional[datetime] = None,
+) -> Iterable[Dict[str, str]]:
+    """Turn describe_db_(cluster_)snapshots records into output rows, keeping those created at or before the cutoff."""
+    for snap in snaps:
+        created = snap.get("SnapshotCreateTime")
+        if not isinstance(created, datetime):
+            continue
+        if cutoff_dt is None or created <= cutoff_dt:
+            name = snap.get(id_key) or "<unnamed>"
+            yield {
+                "name": str(name),
+                "created": format_iso(created),
+            }
+
+
+def iter_ebs(
+    client: BaseClient,
+    cutoff_dt: Optional[datetime] = None,
+    only_named: bool = False,
+) -> Iterable[Dict[str, str]]:
+    # Limit to snapshots owned by the caller.
+    params: Dict[str, object] = {"OwnerIds": ["self"], "MaxResults": EBS_PAGE_SIZE}
+    filters = ebs_snapshot_filters(cutoff_dt, only_named)
+    if filters:
+        params["Filters"] = filters
+
+    # The first page doubles as an emptiness probe: most regions fit in one page (or have no snapshots at all),
+    # and those never need the prefetch thread below.
+    page = client.describe_snapshots(**params)
+    next_token = page.get("NextToken")
+    if not next_token:
+        yield from ebs_rows(page.get("Snapshots", []), cutoff_dt)
+        return
+
+    # Paginate by hand so the request for page N+1 is in flight while page N is being processed.
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        while True:
+            pending: Optional[Future] = (
+                prefetcher.submit(client.describe_snapshots, NextToken=next_token, **params) if next_token else None
+            )
+            yield from ebs_rows(page.get("Snapshots", []), cutoff_dt)
+            if pending is None:
+                break
+            page = pending.result()
+            next_token = page.get("NextToken")
+
+
+def iter_rds_instances(
+    client: BaseClient,
+    cutoff_dt: Optional[datetime] = None,
+) -> Iterable[Dict[str, str]]:
+    paginator = client.get_paginator("describe_db_snapshots")
+    # RDS has no creation-time filter, so the cutoff is applied client-side.
+    page_iterator = paginator.paginate(PaginationConfig={"PageSize": RDS_PAGE_SIZE})
+    for page in page_iterator:
+        yield from rds_rows(page.get("DBSnapshots", []), "DBSnapshotIdentifier", cutoff_dt)
+
+
+def iter_rds_clusters(
+    client: BaseClient,
+    cutoff_dt: Optional[datetime] = None,
+) -> Iterable[Dict[str, str]]:
+    paginator = client.get_paginator("describe_db_cluster_snapshots")
+    # RDS has no creation-time filter, so the cutoff is applied client-side.
+    page_iterator = paginator.paginate(PaginationConfig={"PageSize": RDS_PAGE_SIZE})
+    for page in page_iterator:
+        yield from rds_rows(page.get("DBClusterSnapshots", []), "DBClusterSnapshotIdentifier", cutoff_dt)